@@ -0,0 +1,88 @@
+import pandas as pd
+
+from keywords import KEYWORD_CATEGORIES
+
+
+def _build_masked_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    集計用の中間 DataFrame を作成
+
+    カテゴリごとのマスク（is_{category}）を一度だけ計算し、
+    マスクで絞り込んだ再生回数列をあらかじめ用意しておくことで、
+    groupby 側はすべて列単位の組み込み集計で済むようにする。
+    """
+    views = pd.to_numeric(df["views"], errors="coerce")
+    masked = pd.DataFrame(
+        {
+            "channel_id": df["channel_id"],
+            "channel_title": df["channel_title"],
+            # 日付が無効な行は欠損値のまま（月別集計の groupby で除外される）
+            "month": pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m"),
+            "views": views,
+        },
+        index=df.index,
+    )
+
+    for category in KEYWORD_CATEGORIES.keys():
+        mask = df[f"is_{category}"].astype("boolean").fillna(False).astype(bool)
+        masked[f"is_{category}"] = mask
+        masked[f"views_{category}"] = views.where(mask)
+        masked[f"views_not_{category}"] = views.where(~mask)
+
+    return masked
+
+
+def aggregate_by_group(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    分析済み DataFrame を keys 単位で集計し、DataFrame をReturn
+
+    Args:
+        df: analyze_subtitles 後の DataFrame
+            (channel_id, channel_title, date, views, is_{category} を含む)
+        keys: 集計単位 (例: ["channel_id", "channel_title"],
+              ["channel_id", "channel_title", "month"])
+
+    追加される列:
+        - video_count: 動画数
+        - median_views: 再生回数の中央値
+        - {category}_share: is_{category} が True の動画の割合
+        - {category}_median_views: 該当動画の再生回数の中央値
+        - {category}_lift: 該当動画 / 非該当動画 の再生回数中央値の比
+    """
+    masked = _build_masked_frame(df)
+    grouped = masked.groupby(keys, sort=True, observed=True)
+
+    agg_spec = {
+        "video_count": ("views", "size"),
+        "median_views": ("views", "median"),
+    }
+    for category in KEYWORD_CATEGORIES.keys():
+        agg_spec[f"{category}_share"] = (f"is_{category}", "mean")
+        agg_spec[f"{category}_median_views"] = (f"views_{category}", "median")
+        agg_spec[f"_{category}_median_views_not"] = (
+            f"views_not_{category}",
+            "median",
+        )
+
+    summary = grouped.agg(**agg_spec)
+
+    for category in KEYWORD_CATEGORIES.keys():
+        not_col = f"_{category}_median_views_not"
+        summary[f"{category}_lift"] = (
+            summary[f"{category}_median_views"]
+            / summary[not_col].where(summary[not_col] > 0)
+        ).round(3)
+        summary = summary.drop(columns=not_col)
+        summary[f"{category}_share"] = summary[f"{category}_share"].round(3)
+
+    return summary.reset_index()
+
+
+def summarize_channels(df: pd.DataFrame) -> pd.DataFrame:
+    """チャンネル単位の集計結果を返す"""
+    return aggregate_by_group(df, ["channel_id", "channel_title"])
+
+
+def summarize_channels_by_month(df: pd.DataFrame) -> pd.DataFrame:
+    """チャンネル × 月 単位の集計結果を返す"""
+    return aggregate_by_group(df, ["channel_id", "channel_title", "month"])
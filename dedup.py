@@ -0,0 +1,165 @@
+"""
+Near-duplicate transcript detection with MinHash + LSH
+MinHash + LSH による字幕の重複（ほぼ同一）検出
+
+再アップロードや総集編などで字幕がほぼ同一の動画をクラスタにまとめ、
+代表動画（クラスタ内で最初に現れた動画）の video_id を duplicate_of 列に記録する。
+クラスタはあくまで目印で、キーワード分析や字幕の保存で結果・本文を共有するのは
+字幕が完全に同一の場合のみ。
+
+- 分析結果の再利用はこのモジュールではなく keyword_cache.count_categories が担う
+  （字幕のフィンガープリントが一致する動画は、キャッシュ済みの出現回数を共有する）。
+- 字幕本文の共有は compact_shared_transcripts（CSV 保存時に完全一致の行の字幕を空にする）。
+LSH のバケット単位で候補を絞るため、比較回数は動画数に対してほぼ線形。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 文字 n-gram の長さ（日本語字幕は分かち書きされないため文字単位で扱う）
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+NUM_BANDS = 16
+SEED = 42
+
+_HASH_BASE = np.uint64(1_000_003)
+
+
+def _shingle_hashes(text: str, shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    """テキストの文字 n-gram をローリングハッシュで 64bit 整数の配列に変換"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(
+        np.uint64
+    )
+    if len(codes) < shingle_size:
+        return np.unique(codes) if len(codes) else codes
+
+    n = len(codes) - shingle_size + 1
+    hashes = np.zeros(n, dtype=np.uint64)
+    for j in range(shingle_size):  # uint64 のオーバーフローは mod 2^64 として扱う
+        hashes = hashes * _HASH_BASE + codes[j : j + n]
+    return np.unique(hashes)
+
+
+def minhash_signatures(
+    texts: list[str], num_perm: int = NUM_PERM, seed: int = SEED
+) -> np.ndarray:
+    """
+    各テキストの MinHash シグネチャを計算
+
+    Returns:
+        shape (len(texts), num_perm) の uint32 配列。
+        空のテキストは全要素が最大値（どの動画とも一致しない扱い）。
+    """
+    rng = np.random.default_rng(seed)
+    # multiply-shift ハッシュ: ((a * x + b) mod 2^64) >> 32, a は奇数
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    empty = np.iinfo(np.uint32).max
+    signatures = np.full((len(texts), num_perm), empty, dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for i, text in enumerate(texts):
+            hashes = _shingle_hashes(text)
+            if len(hashes) == 0:
+                continue
+            permuted = (a[:, None] * hashes[None, :] + b[:, None]) >> np.uint64(32)
+            signatures[i] = permuted.min(axis=1).astype(np.uint32)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            # 出現順が早い方を代表にする
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def cluster_signatures(
+    signatures: np.ndarray,
+    valid: np.ndarray,
+    threshold: float = 0.8,
+    num_bands: int = NUM_BANDS,
+) -> list[int]:
+    """
+    LSH のバンド分割で候補を探し、推定 Jaccard 類似度が threshold 以上のものを統合
+
+    バケット内の全ペアは比較せず、先頭要素とのみ比較する（スター型）ため、
+    巨大なバケットが生じても比較回数はバケットサイズに比例する。
+
+    Returns:
+        各行のクラスタ代表の行番号
+    """
+    n, num_perm = signatures.shape
+    rows_per_band = num_perm // num_bands
+    uf = _UnionFind(n)
+    valid_idx = np.flatnonzero(valid)
+
+    for band in range(num_bands):
+        start = band * rows_per_band
+        band_sig = signatures[:, start : start + rows_per_band]
+        buckets: dict[bytes, int] = {}
+        for i in valid_idx:
+            key = band_sig[i].tobytes()
+            head = buckets.setdefault(key, i)
+            if head == i or uf.find(head) == uf.find(i):
+                continue
+            similarity = np.mean(signatures[head] == signatures[i])
+            if similarity >= threshold:
+                uf.union(head, i)
+
+    return [uf.find(i) for i in range(n)]
+
+
+def mark_duplicates(df: pd.DataFrame, threshold: float = 0.8) -> None:
+    """
+    subtitles 列の重複を検出し、DataFrame に列を追加（インプレイス）
+
+    Args:
+        df: video_id, subtitles を含む DataFrame（インプレイス修正）
+        threshold: 重複とみなす推定 Jaccard 類似度（0〜1）
+
+    追加される列:
+        - duplicate_of: クラスタ代表の video_id（重複がなければ自身の video_id）
+        - duplicate_cluster_size: クラスタに含まれる動画数
+    """
+    texts = df["subtitles"].fillna("").astype(str).tolist()
+    valid = np.array([bool(t) for t in texts])
+
+    signatures = minhash_signatures(texts)
+    roots = cluster_signatures(signatures, valid, threshold=threshold)
+
+    video_ids = df["video_id"].to_numpy()
+    df["duplicate_of"] = video_ids[roots]
+    df["duplicate_cluster_size"] = (
+        df.groupby("duplicate_of")["video_id"].transform("size").astype(int)
+    )
+
+
+def compact_shared_transcripts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    代表動画と字幕が完全に同一の重複動画について、字幕を空にしたコピーを返す
+
+    字幕が一部でも異なる（ほぼ同一の）動画は、本文をそのまま残す。
+    空にした行の字幕は duplicate_of 列の video_id の行から参照できる。
+    """
+    if "duplicate_of" not in df.columns:
+        return df
+    df = df.copy()
+    texts = df["subtitles"].fillna("").astype(str)
+    canonical_texts = pd.Series(texts.to_numpy(), index=df["video_id"])
+    canonical_texts = canonical_texts[~canonical_texts.index.duplicated()]
+    shared = (df["video_id"] != df["duplicate_of"]) & (
+        df["duplicate_of"].map(canonical_texts) == texts
+    )
+    df.loc[shared, "subtitles"] = ""
+    return df
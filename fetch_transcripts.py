@@ -1,7 +1,6 @@
 import os
 import re
 import shutil
-import random, time
 
 from pathlib import Path
 from dotenv import load_dotenv
@@ -9,6 +8,8 @@ from dotenv import load_dotenv
 import pandas as pd
 from yt_dlp import YoutubeDL
 
+import replay
+from rate_limiter import get_limiter
 
 load_dotenv()
 
@@ -17,6 +18,34 @@ load_dotenv()
 SUBTITLE_LANGS = os.getenv("SUBTITLE_LANGS", "ja").split(",")  # 例: ["ja", "en"]
 # 字幕ファイルを一時保存するディレクトリ
 TMP_SUB_DIR = Path("tmp_subs")
+# スロットリング時の最大再試行回数
+MAX_RETRIES = 3
+DEBUG = os.getenv("DEBUG", "False") == "True"
+
+
+class ThrottleDetectingLogger:
+    """
+    yt-dlp の logger として渡し、429 などのスロットリング信号を検出する
+    （ignoreerrors=True では例外が送出されないため、ログから判定する）
+    """
+
+    THROTTLE_PATTERNS = ("HTTP Error 429", "Too Many Requests")
+
+    def __init__(self):
+        self.throttled = False
+
+    def _check(self, msg: str):
+        if any(p in msg for p in self.THROTTLE_PATTERNS):
+            self.throttled = True
+
+    def debug(self, msg: str):
+        self._check(msg)
+
+    def warning(self, msg: str):
+        self._check(msg)
+
+    def error(self, msg: str):
+        self._check(msg)
 
 
 def subtitle_file_to_text(path: Path) -> str:
@@ -61,11 +90,29 @@ def find_downloaded_subfile(video_id: str) -> Path | None:
     return None
 
 
+def download_subtitles(video_id: str, video_url: str, ydl_opts: dict):
+    """
+    字幕ファイルを TMP_SUB_DIR にダウンロード（replay.IO_MODE に応じて記録・再生）
+    """
+    if replay.IO_MODE == "replay":
+        if replay.replay_subtitle_file(video_id, TMP_SUB_DIR):
+            ydl_opts["logger"].error("HTTP Error 429: Too Many Requests (injected)")
+        return
+
+    with YoutubeDL(ydl_opts) as ydl:
+        ydl.download([video_url])
+
+    # スロットリングされた試行は記録しない（字幕なしとして残らないように）
+    if replay.IO_MODE == "record" and not ydl_opts["logger"].throttled:
+        replay.record_subtitle_file(video_id, find_downloaded_subfile(video_id))
+
+
 def extract_subtitles_from_videos(video_ids: list[str]) -> pd.DataFrame:
     """
     字幕をダウンロードし、抽出
     """
     data = []
+    limiter = get_limiter("subtitles")
 
     for cnt, video_id in enumerate(video_ids):
         video_url = f"https://www.youtube.com/watch?v={video_id}"
@@ -89,23 +136,42 @@ def extract_subtitles_from_videos(video_ids: list[str]) -> pd.DataFrame:
         }
 
         try:
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-
-            sub_path = find_downloaded_subfile(video_id)
-
-            subtitles = subtitle_file_to_text(sub_path) if sub_path else ""
-            data.append({"video_id": video_id, "subtitles": subtitles})
-
-            if not sub_path:
-                print(f"No subtitles were found for {video_id}.")
+            for _ in range(MAX_RETRIES):
+                logger = ThrottleDetectingLogger()
+                ydl_opts["logger"] = logger
+                limiter.wait()
+                download_subtitles(video_id, video_url, ydl_opts)
+
+                if not logger.throttled:
+                    limiter.on_success()
+                    break
+                limiter.on_throttle()
+                if DEBUG:
+                    print(
+                        f"Throttled while fetching {video_id}. "
+                        f"rate -> {limiter.rate:.3f} req/s"
+                    )
+
+            if logger.throttled:
+                # 全試行がスロットリング: 「字幕なし」と区別するため字幕は欠損値にする
+                print(
+                    f"Throttled {MAX_RETRIES} times while fetching {video_id}, giving up."
+                )
+                data.append({"video_id": video_id, "subtitles": None})
+            else:
+                sub_path = find_downloaded_subfile(video_id)
+
+                subtitles = subtitle_file_to_text(sub_path) if sub_path else ""
+                data.append({"video_id": video_id, "subtitles": subtitles})
+
+                if not sub_path:
+                    print(f"No subtitles were found for {video_id}.")
 
         except Exception as e:
             print(f"Failed to extract subtitles for {video_id}: {e}")
 
         if cnt % 25 == 0 and cnt > 0:
             print(f"Processed {cnt} videos so far...")
-        time.sleep(random.uniform(0.5, 1.0))
 
     df = pd.DataFrame(data)
     return df
@@ -0,0 +1,168 @@
+"""
+Incremental keyword counting
+キーワード出現回数の差分計算
+
+字幕（transcript）ごとのフィンガープリントと、キーワードごとの出現回数を
+「字幕 × キーワード」の行列としてキャッシュする。
+KEYWORD_CATEGORIES を変更しても、新しく追加されたキーワードや新しい字幕の
+組み合わせだけを数え直し、カテゴリ合計はキャッシュ済みの行列から集計する。
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 未計算のセルを表す値
+_MISSING = -1
+
+
+def transcript_fingerprint(text: str) -> str:
+    """字幕テキストのフィンガープリント"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def category_fingerprint(keywords: set[str]) -> str:
+    """カテゴリのキーワード集合のフィンガープリント（順序に依存しない）"""
+    return hashlib.sha1("\n".join(sorted(keywords)).encode("utf-8")).hexdigest()
+
+
+class KeywordCountCache:
+    """
+    字幕 × キーワードの出現回数キャッシュ
+
+    Attributes:
+        counts: index=字幕フィンガープリント, columns=キーワード の int32 行列
+                （未計算のセルは -1）
+        categories: カテゴリ名 → キーワード集合のフィンガープリント
+                    （前回実行時の値。変更されたカテゴリの表示に使う）
+    """
+
+    def __init__(
+        self,
+        counts: pd.DataFrame | None = None,
+        categories: dict[str, str] | None = None,
+    ):
+        self.counts = counts if counts is not None else pd.DataFrame(dtype="int32")
+        self.categories = categories or {}
+        self.computed_pairs = 0  # 直近の update で新たに数えたペア数
+
+    @classmethod
+    def load(cls, path: Path) -> "KeywordCountCache":
+        """キャッシュを読み込む（存在しない・壊れている場合は空のキャッシュ）"""
+        if not path.exists():
+            return cls()
+        try:
+            data = pd.read_pickle(path)
+            return cls(data["counts"], data["categories"])
+        except Exception as e:
+            print(f"Warning: Failed to load keyword cache ({e}). Rebuilding.")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(exist_ok=True, parents=True)
+        pd.to_pickle({"counts": self.counts, "categories": self.categories}, path)
+
+    def changed_categories(self, categories: dict[str, set[str]]) -> list[str]:
+        """
+        前回実行時からキーワード集合が変わったカテゴリ名を返す
+        （キャッシュが空＝前回実行がない場合は空リスト）
+        """
+        if not self.categories:
+            return []
+        return [
+            name
+            for name, keywords in categories.items()
+            if self.categories.get(name) != category_fingerprint(keywords)
+        ]
+
+    def update(self, texts: pd.Series, keywords: list[str]) -> None:
+        """
+        未計算の 字幕 × キーワード のペアだけを数えて行列に追加
+
+        KEYWORD_CATEGORIES から削除されたキーワードの列は破棄するが、
+        今回の実行に含まれない字幕（他チャンネル・TITLE_FILTER 違いの実行分）の行は残す。
+
+        Args:
+            texts: index=字幕フィンガープリント（重複なし）, 値=字幕テキスト
+            keywords: 数える対象のキーワード
+        """
+        rows = self.counts.index.union(texts.index)
+        matrix = self.counts.reindex(
+            index=rows, columns=keywords, fill_value=_MISSING
+        ).to_numpy(dtype=np.int32, copy=True)
+
+        # 今回の字幕の行について、列（キーワード）ごとに未計算のセルだけを数える
+        positions = rows.get_indexer(texts.index)
+        missing = matrix[positions] == _MISSING
+        self.computed_pairs = int(missing.sum())
+        values = texts.to_numpy()
+        for j in missing.any(axis=0).nonzero()[0]:
+            keyword = keywords[j]
+            targets = missing[:, j].nonzero()[0]
+            matrix[positions[targets], j] = [values[i].count(keyword) for i in targets]
+
+        self.counts = pd.DataFrame(matrix, index=rows, columns=keywords)
+
+    def category_counts(
+        self, fingerprints: pd.Series, categories: dict[str, set[str]]
+    ) -> pd.DataFrame:
+        """
+        各行の字幕について、カテゴリごとのキーワード出現回数を返す
+
+        Args:
+            fingerprints: 各行の字幕フィンガープリント（update 済みであること）
+            categories: カテゴリ名 → キーワード集合
+
+        Returns:
+            index=fingerprints.index, columns=カテゴリ名 の DataFrame
+        """
+        matrix = self.counts.loc[fingerprints.to_numpy()]
+        result = pd.DataFrame(
+            {
+                name: matrix[sorted(keywords)].sum(axis=1).to_numpy()
+                for name, keywords in categories.items()
+            },
+            index=fingerprints.index,
+        )
+        self.categories = {
+            name: category_fingerprint(keywords)
+            for name, keywords in categories.items()
+        }
+        return result
+
+
+def count_categories(
+    texts: pd.Series, categories: dict[str, set[str]], cache_path: Path
+) -> pd.DataFrame:
+    """
+    キャッシュを使ってカテゴリごとのキーワード出現回数を数える
+
+    字幕は各動画自身のテキストでフィンガープリントを取るため、
+    完全に同一の字幕だけが結果を共有する（ほぼ同一の字幕は別々に数える）。
+
+    Args:
+        texts: 各行の字幕テキスト
+        categories: カテゴリ名 → キーワード集合
+        cache_path: キャッシュファイルのパス
+
+    Returns:
+        index=texts.index, columns=カテゴリ名 の DataFrame
+    """
+    texts = texts.fillna("").astype(str)
+    fingerprints = texts.map(transcript_fingerprint)
+
+    cache = KeywordCountCache.load(cache_path)
+    changed = cache.changed_categories(categories)
+    if changed:
+        print(f" Keyword set changed: {', '.join(changed)}")
+
+    unique_texts = pd.Series(texts.to_numpy(), index=fingerprints.to_numpy())
+    unique_texts = unique_texts[~unique_texts.index.duplicated()]
+    cache.update(unique_texts, sorted(set().union(*categories.values())))
+    print(f" Counted {cache.computed_pairs} new transcript x keyword pairs")
+
+    result = cache.category_counts(fingerprints, categories)
+    cache.save(cache_path)
+    return result
@@ -149,6 +149,19 @@ def analyze_by_keywords(df, category: str, threshold: float = 0.5) -> None:
         lambda t: count_keywords_in_category(str(t), category)
     )
 
+    # 2〜4. 1分あたりの出現回数と該当判定
+    derive_category_columns(df, category=category, threshold=threshold)
+
+
+def derive_category_columns(df, category: str, threshold: float = 0.5) -> None:
+    """
+    {category}_word_count 列から {category}_per_min, is_{category} 列を導出（インプレイス）
+
+    Args:
+        df: {category}_word_count, duration(秒) を含む DataFrame（インプレイス修正）
+        category: 分析カテゴリ
+        threshold: 関連性判定の閾値（回/分）
+    """
     # 2. 動画時間を分に変換（duration は秒単位と想定）
     if "duration_min" not in df.columns:
         df["duration_min"] = df["duration"] / 60
@@ -162,6 +175,18 @@ def analyze_by_keywords(df, category: str, threshold: float = 0.5) -> None:
     df[f"is_{category}"] = df[f"{category}_per_min"] >= threshold
 
 
+def add_primary_category(df) -> None:
+    """
+    {category}_per_min が最も高いカテゴリを primary_category 列に追加（インプレイス）
+    全カテゴリが 0 の場合は "none"
+    """
+    per_min = df[[f"{c}_per_min" for c in KEYWORD_CATEGORIES.keys()]].fillna(0)
+    per_min.columns = list(KEYWORD_CATEGORIES.keys())
+    df["primary_category"] = per_min.idxmax(axis=1).where(
+        per_min.max(axis=1) > 0, "none"
+    )
+
+
 def add_title_keyword_flags(df, category: str) -> None:
     """
     タイトルに指定カテゴリのキーワードが含まれているかを判定
@@ -4,7 +4,11 @@ from pathlib import Path
 import pandas as pd
 
 import youtube_client, fetch_transcripts
-from keywords import analyze_by_keywords, KEYWORD_CATEGORIES
+from aggregate import summarize_channels, summarize_channels_by_month
+from dedup import mark_duplicates, compact_shared_transcripts
+from keyword_cache import count_categories
+from keywords import KEYWORD_CATEGORIES, add_primary_category, derive_category_columns
+from rate_limiter import limiter_metrics
 
 
 ### Perform initial settings in .env and run in python main.py ###
@@ -27,6 +31,14 @@ OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "output").strip())
 OUTPUT_DIR.mkdir(exist_ok=True)
 
 THRESHOLD = float(os.getenv("THRESHOLD", "0.5"))
+# 字幕の重複判定の閾値（推定 Jaccard 類似度）。0 で重複検出を行わない
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+# キーワード出現回数のキャッシュ（KEYWORD_CATEGORIES 変更時は差分のみ再計算）
+# 分析結果と混ざらないよう、既定では OUTPUT_DIR とは別のディレクトリに保存
+KEYWORD_CACHE_PATH = Path(
+    os.getenv("KEYWORD_CACHE_PATH", ".cache/keyword_cache.pkl").strip()
+)
 
 DEBUG = os.getenv("DEBUG", "False").strip().lower() == "true"
 
@@ -36,25 +48,22 @@ DEBUG = os.getenv("DEBUG", "False").strip().lower() == "true"
 def analyze_subtitles(df: pd.DataFrame) -> pd.DataFrame:
     """キーワード分析を実行し、DataFrame をReturn"""
 
-    # 1. 全カテゴリで分析
+    # 1. 未計算の 字幕 × キーワード のみ数え、カテゴリごとに集計
+    category_counts = count_categories(
+        df["subtitles"], KEYWORD_CATEGORIES, KEYWORD_CACHE_PATH
+    )
+
+    # 2. 1分あたりの出現回数・該当判定を列単位で導出
     for category in KEYWORD_CATEGORIES.keys():
         print(f" Analyzing:{category}")
-        analyze_by_keywords(df, category=category, threshold=THRESHOLD)
-
-    # 2. 主要カテゴリを決定（最も出現回数が多いカテゴリ）
-    def get_primary_category(row):
-        """各行で最も該当度が高いカテゴリを返す"""
-        scores = {}
-        for category in KEYWORD_CATEGORIES.keys():
-            col = f"{category}_per_min"
-            scores[category] = row.get(col, 0)
-        return (
-            max(scores, key=scores.get)
-            if max(scores.values(), default=0) > 0
-            else "none"
+        # 字幕を取得できなかった動画（欠損値）は 0 回ではなく欠損値のままにする
+        df[f"{category}_word_count"] = category_counts[category].where(
+            df["subtitles"].notna()
         )
+        derive_category_columns(df, category=category, threshold=THRESHOLD)
 
-    df["primary_category"] = df.apply(get_primary_category, axis=1)
+    # 3. 主要カテゴリを決定（最も出現回数が多いカテゴリ）
+    add_primary_category(df)
     first_cols = ["video_id", "title", "primary_category"]
     df = df[first_cols + [c for c in df.columns if c not in first_cols]]
 
@@ -69,7 +78,8 @@ def save_to_csv(df: pd.DataFrame, output_path: Path):
     print(f"✓Save analysis results: {output_path}")
 
 
-if __name__ == "__main__":
+def main():
+    """パイプライン全体（API 取得 → 字幕取得 → 分析 → csv で保存）を実行"""
     if not VIDEO_IDS:
         print("ERROR: VIDEO_IDS not set. Please check your .env file.")
         exit(1)
@@ -130,13 +140,34 @@ if __name__ == "__main__":
 
     print(f"  Number of integrated lines: {len(result)}")
 
+    # 重複字幕の検出（再アップロード・総集編など）
+    if DUPLICATE_THRESHOLD > 0:
+        mark_duplicates(result, threshold=DUPLICATE_THRESHOLD)
+        n_duplicates = int((result["video_id"] != result["duplicate_of"]).sum())
+        print(f"  Near-duplicate transcripts: {n_duplicates}")
+
     # Step 6 キーワード分析 & CSV出力
     print("[6] Keyword analysis in progress...")
     result_analyzed = analyze_subtitles(result)
 
     # Step 7: CSV に保存
     print("[7] Saving results...")
-    save_to_csv(result_analyzed, OUTPUT_DIR / "video_analysis_result.csv")
+    save_to_csv(
+        compact_shared_transcripts(result_analyzed),
+        OUTPUT_DIR / "video_analysis_result.csv",
+    )
+
+    # チャンネル別・月別の集計
+    channel_summary = summarize_channels(result_analyzed)
+    save_to_csv(channel_summary, OUTPUT_DIR / "channel_summary.csv")
+    save_to_csv(
+        summarize_channels_by_month(result_analyzed),
+        OUTPUT_DIR / "channel_monthly_summary.csv",
+    )
+
+    # 実行メトリクス（エンドポイント別の現在レートなど）
+    run_metrics = pd.DataFrame(limiter_metrics())
+    save_to_csv(run_metrics, OUTPUT_DIR / "run_metrics.csv")
 
     # Step 8: 一時ディレクトリ削除
     print("[8] Deleting temporary subtitle files...")
@@ -161,5 +192,24 @@ if __name__ == "__main__":
                 ]
             ].head(10)
         )
+        print("\n[Channel summary]")
+        print(
+            channel_summary[
+                [
+                    "channel_title",
+                    "video_count",
+                    "median_views",
+                    "medical_share",
+                    "medical_lift",
+                ]
+            ]
+        )
+
+    print("\n[Rate limiter metrics]")
+    print(run_metrics)
 
     print(f"\n output file: {OUTPUT_DIR / 'analysis_result.csv'}")
+
+
+if __name__ == "__main__":
+    main()
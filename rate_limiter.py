@@ -0,0 +1,162 @@
+import random
+import time
+from typing import Callable
+
+import replay
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD（加算増加・乗算減少）方式のレートリミッタ
+
+    リクエスト成功ごとにレートを少しずつ上げ (additive increase)、
+    429 などのスロットリング信号を受けたらレートを一気に下げる (multiplicative decrease)。
+    clock / sleep を差し替えることで、実時間を使わずにテストできる。
+
+    Args:
+        name: エンドポイント種別名（メトリクス表示用）
+        initial_rate: 初期レート（リクエスト/秒）
+        min_rate: 下限レート
+        max_rate: 上限レート
+        increase: 成功1回あたりのレート増加量
+        decrease_factor: スロットリング時にレートへ掛ける係数 (0 < x < 1)
+        jitter: 待ち時間に加えるゆらぎの割合 (0.2 なら ±20%)
+        clock: 現在時刻（秒）を返す関数
+        sleep: 指定秒数待機する関数
+        rng: jitter に使う乱数生成器（省略時は random モジュール）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float = 0.1,
+        decrease_factor: float = 0.5,
+        jitter: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ):
+        if not 0 < min_rate <= initial_rate <= max_rate:
+            raise ValueError(
+                f"Invalid rates for {name}: "
+                f"min={min_rate}, initial={initial_rate}, max={max_rate}"
+            )
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f"decrease_factor must be in (0, 1): {decrease_factor}")
+
+        self.name = name
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random
+
+        self._next_allowed = clock()
+        self.requests = 0
+        self.successes = 0
+        self.throttles = 0
+        self.total_wait = 0.0
+
+    @property
+    def interval(self) -> float:
+        """現在のレートにおけるリクエスト間隔（秒）"""
+        return 1.0 / self.rate
+
+    def wait(self) -> None:
+        """次のリクエストが許可されるまで待機する"""
+        now = self._clock()
+        delay = self._next_allowed - now
+        if delay > 0:
+            self._sleep(delay)
+            self.total_wait += delay
+            now = self._clock()
+
+        interval = self.interval
+        if self.jitter:
+            interval *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        self._next_allowed = now + interval
+        self.requests += 1
+
+    def on_success(self) -> None:
+        """リクエスト成功: レートを加算的に上げる"""
+        self.successes += 1
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """
+        スロットリング信号を受信: レートを乗算的に下げる
+
+        retry_after（秒）が与えられた場合は、その時間が経過するまで次のリクエストを止める。
+        """
+        self.throttles += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+        now = self._clock()
+        pause = max(retry_after or 0.0, self.interval)
+        self._next_allowed = max(self._next_allowed, now + pause)
+
+    def metrics(self) -> dict:
+        """現在のレートと統計情報を返す"""
+        return {
+            "endpoint": self.name,
+            "rate_per_sec": round(self.rate, 3),
+            "requests": self.requests,
+            "successes": self.successes,
+            "throttles": self.throttles,
+            "total_wait_sec": round(self.total_wait, 3),
+        }
+
+
+# ============================================
+# エンドポイント種別ごとの設定（リクエスト/秒）
+# 初期値は従来の固定 sleep（0.1–0.2 s / 0.3–0.5 s / 0.5–1.0 s）相当
+# ============================================
+LIMITER_SETTINGS = {
+    "videos": {"initial_rate": 6.0, "min_rate": 0.2, "max_rate": 20.0},
+    "playlist_items": {"initial_rate": 2.5, "min_rate": 0.2, "max_rate": 10.0},
+    "subtitles": {"initial_rate": 1.3, "min_rate": 0.05, "max_rate": 4.0},
+}
+
+_limiters: dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_limiter(name: str) -> AdaptiveRateLimiter:
+    """
+    エンドポイント種別ごとに共有されるリミッタを返す
+
+    replay モードでは、jitter の乱数を REPLAY_SEED から初期化し、
+    時計は replay.clock / replay.sleep を使う（REPLAY_SIMULATED_CLOCK で疑似時計）。
+    """
+    if name not in _limiters:
+        if name not in LIMITER_SETTINGS:
+            raise ValueError(
+                f"Invalid endpoint: {name}. Valid value: {list(LIMITER_SETTINGS.keys())}"
+            )
+        options = {}
+        if replay.IO_MODE == "replay":
+            options = {
+                "rng": random.Random(f"{replay.REPLAY_SEED}:{name}"),
+                "clock": replay.clock,
+                "sleep": replay.sleep,
+            }
+        _limiters[name] = AdaptiveRateLimiter(
+            name, jitter=0.2, **LIMITER_SETTINGS[name], **options
+        )
+    return _limiters[name]
+
+
+def reset_limiters() -> None:
+    """共有リミッタを破棄する（次回の get_limiter で初期状態から作り直す）"""
+    _limiters.clear()
+
+
+def limiter_metrics() -> list[dict]:
+    """使用された全リミッタのメトリクスを返す"""
+    return [limiter.metrics() for limiter in _limiters.values()]
@@ -0,0 +1,200 @@
+"""
+Record / replay layer for YouTube Data API and yt-dlp I/O
+YouTube Data API と yt-dlp の通信を記録・再生するレイヤ
+
+IO_MODE=record で実行すると API レスポンスと字幕ファイルを REPLAY_ARCHIVE に保存し、
+IO_MODE=replay ではネットワークに接続せず、保存済みのデータだけで main.py 全体を実行できる。
+replay 時は REPLAY_LATENCY（秒）の疑似遅延と、REPLAY_ERROR_RATE の確率で
+疑似スロットリング（HTTP 429）を発生させられる。乱数はすべて REPLAY_SEED から初期化され、
+REPLAY_SIMULATED_CLOCK=True では待機も疑似時計で進むため、実行結果と所要時間の
+メトリクスが再現可能になる。
+
+API キーはアーカイブに保存されない（URL の key= を除いたものを検索キーにする）ため、
+replay 時の YOUTUBE_API_KEY は任意の値でよい。
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IO_MODE = os.getenv("IO_MODE", "live").strip().lower()  # live / record / replay
+ARCHIVE_DIR = Path(os.getenv("REPLAY_ARCHIVE", "replay_archive").strip())
+REPLAY_LATENCY = float(os.getenv("REPLAY_LATENCY", "0"))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0"))
+REPLAY_SEED = int(os.getenv("REPLAY_SEED", "0"))
+# True なら replay 時の待機（疑似遅延・レートリミッタ）を実時間ではなく疑似時計で進める
+REPLAY_SIMULATED_CLOCK = (
+    os.getenv("REPLAY_SIMULATED_CLOCK", "False").strip().lower() == "true"
+)
+
+if IO_MODE not in ("live", "record", "replay"):
+    raise ValueError(f"Invalid IO_MODE: {IO_MODE}. Valid value: live, record, replay")
+
+# 字幕が見つからなかった動画を記録するためのマーカーファイル拡張子
+_NO_SUBTITLE_SUFFIX = ".none"
+
+
+class SimulatedClock:
+    """sleep で時刻が進むだけの疑似時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.0)
+
+
+_rng = random.Random(REPLAY_SEED)
+_simulated_clock = SimulatedClock()
+
+
+def clock() -> float:
+    """replay 時の現在時刻（秒）"""
+    if REPLAY_SIMULATED_CLOCK:
+        return _simulated_clock()
+    return time.monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """replay 時の待機"""
+    if REPLAY_SIMULATED_CLOCK:
+        _simulated_clock.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def reset(seed: int | None = None) -> None:
+    """疑似エラー・疑似遅延の乱数と疑似時計を初期状態に戻す"""
+    global _rng, _simulated_clock
+    _rng = random.Random(REPLAY_SEED if seed is None else seed)
+    _simulated_clock = SimulatedClock()
+
+
+def _strip_api_key(url: str) -> str:
+    """URL から key= パラメータを除いて返す"""
+    parts = urlsplit(url)
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k != "key"
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _api_path(url: str) -> Path:
+    key = hashlib.sha1(_strip_api_key(url).encode("utf-8")).hexdigest()
+    return ARCHIVE_DIR / "api" / f"{key}.json"
+
+
+def _simulate_network() -> bool:
+    """疑似遅延を入れ、疑似エラーを発生させるなら True を返す"""
+    if REPLAY_LATENCY > 0:
+        sleep(REPLAY_LATENCY * _rng.uniform(0.5, 1.5))
+    return _rng.random() < REPLAY_ERROR_RATE
+
+
+def _build_response(
+    url: str, status: int, body: str, headers: dict
+) -> requests.Response:
+    resp = requests.Response()
+    resp.url = url
+    resp.status_code = status
+    resp.headers.update(headers)
+    resp._content = body.encode("utf-8")
+    resp.encoding = "utf-8"
+    return resp
+
+
+def http_get(
+    url: str,
+    timeout: int = 10,
+    skip_record: Callable[[requests.Response], bool] | None = None,
+) -> requests.Response:
+    """
+    IO_MODE に応じて GET を実行する
+
+    - live: requests.get をそのまま実行
+    - record: requests.get を実行し、レスポンスをアーカイブに保存
+              （skip_record(resp) が True のレスポンス＝再試行されるスロットリング等は保存しない）
+    - replay: アーカイブからレスポンスを再生（未記録の URL は ConnectionError）
+    """
+    if IO_MODE == "replay":
+        if _simulate_network():
+            return _build_response(url, 429, "Too Many Requests (injected)", {})
+
+        path = _api_path(url)
+        if not path.exists():
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {_strip_api_key(url)}"
+            )
+        record = json.loads(path.read_text(encoding="utf-8"))
+        return _build_response(
+            url, record["status"], record["body"], record["headers"]
+        )
+
+    resp = requests.get(url, timeout=timeout)
+
+    if IO_MODE == "record" and not (skip_record and skip_record(resp)):
+        path = _api_path(url)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        record = {
+            "url": _strip_api_key(url),
+            "status": resp.status_code,
+            "headers": {
+                k: v for k, v in resp.headers.items() if k.lower() == "retry-after"
+            },
+            "body": resp.text,
+        }
+        path.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+
+    return resp
+
+
+def record_subtitle_file(video_id: str, sub_path: Path | None) -> None:
+    """ダウンロード済みの字幕ファイルをアーカイブにコピー（字幕なしならマーカーを保存）"""
+    sub_dir = ARCHIVE_DIR / "subtitles"
+    sub_dir.mkdir(exist_ok=True, parents=True)
+    if sub_path:
+        shutil.copy2(sub_path, sub_dir / sub_path.name)
+    else:
+        (sub_dir / f"{video_id}{_NO_SUBTITLE_SUFFIX}").touch()
+
+
+def replay_subtitle_file(video_id: str, dest_dir: Path) -> bool:
+    """
+    アーカイブの字幕ファイルを dest_dir にコピーし、yt-dlp のダウンロードを再現する
+
+    字幕ファイルも「字幕なし」マーカーも記録されていない動画は、
+    http_get と同様に ConnectionError を送出する。
+
+    Returns:
+        疑似スロットリングが発生した場合 True（このときファイルはコピーしない）
+    """
+    if _simulate_network():
+        return True
+
+    recorded = list((ARCHIVE_DIR / "subtitles").glob(f"{video_id}.*"))
+    if not recorded:
+        raise requests.exceptions.ConnectionError(
+            f"No recorded subtitles for {video_id}"
+        )
+
+    dest_dir.mkdir(exist_ok=True, parents=True)
+    for path in recorded:
+        if path.suffix != _NO_SUBTITLE_SUFFIX:
+            shutil.copy2(path, dest_dir / path.name)
+    return False
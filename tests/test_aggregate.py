@@ -0,0 +1,56 @@
+import warnings
+
+import pandas as pd
+
+from aggregate import summarize_channels, summarize_channels_by_month
+
+
+def _sample_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "video_id": ["a", "b", "c", "d", "e"],
+            "channel_id": ["UC1", "UC1", "UC1", "UC1", "UC2"],
+            "channel_title": ["ch1", "ch1", "ch1", "ch1", "ch2"],
+            "date": ["2024-01-05", "2024-01-20", "2024-02-01", "2024-02-10", "2024-01-01"],
+            "views": [1000, 3000, 100, 300, 50],
+            "is_medical": [True, False, True, False, False],
+            "is_legal": [False, False, False, True, True],
+            "is_daily_surprising": [False, True, False, False, False],
+        }
+    )
+
+
+def test_summarize_channels():
+    result = summarize_channels(_sample_df()).set_index("channel_id")
+
+    assert result.loc["UC1", "video_count"] == 4
+    assert result.loc["UC1", "medical_share"] == 0.5
+    assert result.loc["UC1", "medical_median_views"] == 550  # median(1000, 100)
+    assert result.loc["UC1", "medical_lift"] == round(550 / 1650, 3)
+    assert pd.isna(result.loc["UC2", "medical_lift"])  # 該当動画なし
+
+
+def test_summarize_channels_by_month():
+    result = summarize_channels_by_month(_sample_df())
+
+    assert len(result) == 3  # UC1 x 2か月 + UC2 x 1か月
+    jan = result[(result["channel_id"] == "UC1") & (result["month"] == "2024-01")]
+    assert jan["video_count"].iloc[0] == 2
+    assert jan["medical_lift"].iloc[0] == round(1000 / 3000, 3)
+
+
+def test_invalid_dates_and_missing_flags():
+    df = _sample_df()
+    df.loc[4, "date"] = None
+    df = df.astype({"is_medical": object})
+    df.loc[0, "is_medical"] = None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        monthly = summarize_channels_by_month(df)
+        channel = summarize_channels(df).set_index("channel_id")
+
+    assert monthly["month"].notna().all()  # 日付なしの行は月別集計に含めない
+    assert "UC2" not in monthly["channel_id"].tolist()
+    assert channel.loc["UC2", "video_count"] == 1  # チャンネル別には含める
+    assert channel.loc["UC1", "medical_share"] == 0.25
@@ -0,0 +1,82 @@
+import random
+
+import pandas as pd
+
+from dedup import compact_shared_transcripts, mark_duplicates
+from keyword_cache import count_categories
+from keywords import (
+    KEYWORD_CATEGORIES,
+    analyze_by_keywords,
+    count_keywords_in_category,
+)
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    return "".join(chr(rng.randint(0x3041, 0x3096)) for _ in range(length))
+
+
+def _sample_df() -> pd.DataFrame:
+    rng = random.Random(0)
+    base = _random_text(rng, 2000) + "手術と病院"
+    near = base[:1950] + _random_text(rng, 50) + "手術と病院"  # 末尾だけ異なる
+    other = _random_text(rng, 2000)
+    return pd.DataFrame(
+        {
+            "video_id": ["a", "b", "c", "d", "e"],
+            "subtitles": [base, other, near, base, ""],
+            "duration": [600, 600, 600, 1200, 600],
+        }
+    )
+
+
+def test_mark_duplicates():
+    df = _sample_df()
+    mark_duplicates(df, threshold=0.8)
+
+    assert df["duplicate_of"].tolist() == ["a", "b", "a", "a", "e"]
+    assert df["duplicate_cluster_size"].tolist() == [3, 1, 3, 3, 1]
+
+
+def test_compact_shared_transcripts():
+    df = _sample_df()
+    mark_duplicates(df, threshold=0.8)
+    result = compact_shared_transcripts(df)
+
+    # 完全に同一の "d" のみ空にし、ほぼ同一の "c" は本文を残す
+    assert result["subtitles"].tolist()[1:4] == [
+        df["subtitles"].iloc[1],
+        df["subtitles"].iloc[2],
+        "",
+    ]
+    assert df["subtitles"].iloc[3] != ""  # 元の DataFrame は変更しない
+
+
+def test_near_duplicate_with_extra_keywords_is_counted_separately(tmp_path):
+    rng = random.Random(1)
+    base = _random_text(rng, 3000)
+    extra = base + "病院" * 8  # ほぼ同一だが医療キーワードが8回多い
+    df = pd.DataFrame(
+        {"video_id": ["a", "b"], "subtitles": [base, extra], "duration": [600, 600]}
+    )
+    mark_duplicates(df, threshold=0.8)
+    assert df["duplicate_of"].tolist() == ["a", "a"]
+
+    counts = count_categories(
+        df["subtitles"], KEYWORD_CATEGORIES, tmp_path / "cache.pkl"
+    )
+    expected = count_keywords_in_category(extra, "medical")
+    assert counts["medical"].tolist() == [expected - 8, expected]
+
+    assert compact_shared_transcripts(df)["subtitles"].iloc[1] == extra
+
+
+def test_repeated_video_ids():
+    df = _sample_df()
+    df = pd.concat([df, df.iloc[[0]]], ignore_index=True)  # video_id "a" が2回
+    mark_duplicates(df, threshold=0.8)
+    analyze_by_keywords(df, "medical")
+    result = compact_shared_transcripts(df)
+
+    expected = count_keywords_in_category(df["subtitles"].iloc[0], "medical")
+    assert df["medical_word_count"].iloc[5] == expected
+    assert result["subtitles"].iloc[0] == df["subtitles"].iloc[0]
@@ -0,0 +1,91 @@
+import pandas as pd
+
+from keyword_cache import KeywordCountCache, transcript_fingerprint
+from keywords import (
+    KEYWORD_CATEGORIES,
+    add_primary_category,
+    count_keywords_in_category,
+)
+
+
+def _texts(values: list[str]) -> pd.Series:
+    return pd.Series(values, index=[transcript_fingerprint(v) for v in values])
+
+
+def test_category_counts_match_direct_count():
+    categories = {"medical": {"病院", "手術"}, "legal": {"逮捕", "病院"}}
+    texts = _texts(["病院で手術、病院へ", "逮捕された", ""])
+    cache = KeywordCountCache()
+    cache.update(texts, ["手術", "病院", "逮捕"])
+
+    result = cache.category_counts(pd.Series(texts.index), categories)
+
+    assert result["medical"].tolist() == [3, 0, 0]
+    assert result["legal"].tolist() == [2, 1, 0]
+
+
+def test_update_recomputes_only_new_pairs(tmp_path):
+    path = tmp_path / "cache.pkl"
+    texts = _texts(["病院で手術", "逮捕された"])
+    cache = KeywordCountCache()
+    cache.update(texts, ["手術", "病院"])
+    cache.category_counts(pd.Series(texts.index), {"medical": {"手術", "病院"}})
+    cache.save(path)
+
+    assert KeywordCountCache().changed_categories({"medical": {"手術"}}) == []
+
+    cache = KeywordCountCache.load(path)
+    assert cache.changed_categories({"medical": {"手術", "病院"}}) == []
+    assert cache.changed_categories({"medical": {"手術", "病院", "薬"}}) == ["medical"]
+
+    # キーワード1つ + 字幕1つを追加: 2×1 + 1×3 = 5 ペアのみ計算
+    texts = _texts(["病院で手術", "逮捕された", "薬を飲んだ"])
+    cache.update(texts, ["手術", "病院", "薬"])
+    assert cache.computed_pairs == 5
+
+    cache.update(texts, ["手術", "病院", "薬"])
+    assert cache.computed_pairs == 0
+
+
+def test_category_counts_match_keywords_module():
+    text = "病院で手術を受けた。がんの治療のため入院"
+    texts = _texts([text])
+    cache = KeywordCountCache()
+    cache.update(texts, sorted(set().union(*KEYWORD_CATEGORIES.values())))
+    result = cache.category_counts(pd.Series(texts.index), KEYWORD_CATEGORIES)
+
+    for category in KEYWORD_CATEGORIES:
+        assert result[category].iloc[0] == count_keywords_in_category(text, category)
+
+
+def test_add_primary_category():
+    df = pd.DataFrame(
+        {
+            "medical_per_min": [1.0, 0.0, None],
+            "legal_per_min": [2.0, 0.0, 0.5],
+            "daily_surprising_per_min": [0.5, 0.0, None],
+        }
+    )
+    add_primary_category(df)
+
+    assert df["primary_category"].tolist() == ["legal", "none", "legal"]
+
+
+def test_update_keeps_other_transcripts_and_drops_removed_keywords(tmp_path):
+    cache = KeywordCountCache()
+    texts = _texts(["病院で手術", "逮捕された", "薬を飲んだ"])
+    cache.update(texts, ["手術", "病院", "薬"])
+
+    # 字幕の一部だけ（TITLE_FILTER などで絞り込んだ実行）、キーワード1つ削除
+    cache.update(_texts(["病院で手術"]), ["手術", "病院"])
+    assert cache.computed_pairs == 0
+    assert cache.counts.shape == (3, 2)
+    assert (cache.counts.dtypes == "int32").all()
+
+    path = tmp_path / "cache.pkl"
+    cache.save(path)
+
+    # 全字幕で再実行しても、他の実行分の字幕は数え直さない
+    cache = KeywordCountCache.load(path)
+    cache.update(texts, ["手術", "病院"])
+    assert cache.computed_pairs == 0
@@ -0,0 +1,78 @@
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter
+from replay import SimulatedClock
+
+
+class FakeServer:
+    """直近1秒間のリクエスト数が capacity を超えると 429 を返す疑似サーバ"""
+
+    def __init__(self, clock: SimulatedClock, capacity: int):
+        self.clock = clock
+        self.capacity = capacity
+        self.history = []
+
+    def request(self) -> int:
+        now = self.clock()
+        self.history = [t for t in self.history if now - t < 1.0]
+        if len(self.history) >= self.capacity:
+            return 429
+        self.history.append(now)
+        return 200
+
+
+def _make_limiter(clock: SimulatedClock, **kwargs) -> AdaptiveRateLimiter:
+    settings = dict(initial_rate=1.0, min_rate=0.1, max_rate=50.0, increase=0.5)
+    settings.update(kwargs)
+    return AdaptiveRateLimiter("test", clock=clock, sleep=clock.sleep, **settings)
+
+
+def _run(limiter: AdaptiveRateLimiter, server: FakeServer, n: int) -> int:
+    throttled = 0
+    for _ in range(n):
+        limiter.wait()
+        if server.request() == 429:
+            limiter.on_throttle()
+            throttled += 1
+        else:
+            limiter.on_success()
+    return throttled
+
+
+def test_speeds_up_while_healthy():
+    clock = SimulatedClock()
+    limiter = _make_limiter(clock)
+    server = FakeServer(clock, capacity=1000)
+
+    _run(limiter, server, 20)
+
+    assert limiter.throttles == 0
+    assert limiter.rate == pytest.approx(11.0)  # 1.0 + 0.5 * 20
+
+
+def test_backs_off_and_converges_near_capacity():
+    clock = SimulatedClock()
+    limiter = _make_limiter(clock)
+    server = FakeServer(clock, capacity=5)
+
+    throttled = _run(limiter, server, 500)
+
+    assert throttled > 0
+    assert limiter.throttles == throttled
+    # 成功したリクエストの平均レートがサーバ容量を超えず、かつ大きく下回らない
+    achieved = limiter.successes / clock.now
+    assert 2.5 < achieved <= 5.0
+    assert throttled < 0.2 * limiter.requests
+
+
+def test_on_throttle_respects_retry_after():
+    clock = SimulatedClock()
+    limiter = _make_limiter(clock, initial_rate=10.0)
+
+    limiter.wait()
+    limiter.on_throttle(retry_after=30)
+    limiter.wait()
+
+    assert limiter.rate == 5.0
+    assert clock.now == pytest.approx(30.0)
+    assert limiter.metrics()["throttles"] == 1
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import requests
+
+import replay
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(replay, "REPLAY_LATENCY", 0)
+    monkeypatch.setattr(replay, "REPLAY_ERROR_RATE", 0)
+    return tmp_path
+
+
+def _fake_get(url, timeout=10):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = json.dumps({"items": [{"id": "abc"}]}).encode("utf-8")
+    resp.encoding = "utf-8"
+    return resp
+
+
+URL = "https://www.googleapis.com/youtube/v3/videos?part=snippet&id=abc&key=SECRET"
+
+
+def test_record_then_replay(archive, monkeypatch):
+    monkeypatch.setattr(replay, "IO_MODE", "record")
+    monkeypatch.setattr(replay.requests, "get", _fake_get)
+    replay.http_get(URL)
+
+    saved = list((archive / "api").glob("*.json"))
+    assert len(saved) == 1
+    assert "SECRET" not in saved[0].read_text(encoding="utf-8")  # API キーは保存しない
+
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    resp = replay.http_get(URL.replace("SECRET", "OTHER"))
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [{"id": "abc"}]}
+
+
+def test_record_skips_throttled_response(archive, monkeypatch):
+    def throttled_get(url, timeout=10):
+        resp = _fake_get(url, timeout)
+        resp.status_code = 429
+        return resp
+
+    monkeypatch.setattr(replay, "IO_MODE", "record")
+    monkeypatch.setattr(replay.requests, "get", _fake_get)
+    replay.http_get(URL)
+
+    # 再試行時の 429 が記録済みの正常なレスポンスを上書きしない
+    monkeypatch.setattr(replay.requests, "get", throttled_get)
+    resp = replay.http_get(URL, skip_record=lambda r: r.status_code == 429)
+    assert resp.status_code == 429
+
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    assert replay.http_get(URL).status_code == 200
+
+
+def test_replay_missing_url_raises(archive, monkeypatch):
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replay.http_get(URL)
+
+
+def test_replay_error_injection(archive, monkeypatch):
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    monkeypatch.setattr(replay, "REPLAY_ERROR_RATE", 1.0)
+
+    assert replay.http_get(URL).status_code == 429
+    assert replay.replay_subtitle_file("abc", archive / "dest") is True
+
+
+def test_record_and_replay_subtitle_file(archive, tmp_path):
+    src = tmp_path / "abc.ja.vtt"
+    src.write_text("WEBVTT\n\nこんにちは", encoding="utf-8")
+    replay.record_subtitle_file("abc", src)
+    replay.record_subtitle_file("xyz", None)
+
+    dest = tmp_path / "dest"
+    assert replay.replay_subtitle_file("abc", dest) is False
+    assert (dest / "abc.ja.vtt").read_text(encoding="utf-8") == src.read_text(
+        encoding="utf-8"
+    )
+
+    replay.replay_subtitle_file("xyz", dest)
+    assert not list(dest.glob("xyz.*"))  # 字幕なしの動画はファイルを作らない
+
+
+def test_replay_unrecorded_subtitle_raises(archive, monkeypatch):
+    replay.record_subtitle_file("xyz", None)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replay.replay_subtitle_file("never_recorded", archive / "dest")
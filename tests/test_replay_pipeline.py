@@ -0,0 +1,182 @@
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+import requests
+
+os.environ.setdefault("YOUTUBE_API_KEY", "dummy")  # replay ではキーは使われない
+
+import fetch_transcripts
+import rate_limiter
+import replay
+import youtube_client
+from keywords import count_keywords_in_category
+
+VIDEO_IDS = [f"v{i}" for i in range(6)]
+SUBTITLES = {
+    "v0": "病院で手術を受けた" * 10,
+    "v1": "病院で手術を受けた" * 10,
+    "v2": "容疑者が逮捕された" * 5,
+    "v3": "奇跡的に助かった" * 5,
+    "v4": "容疑者が逮捕された" * 5 + "病院" * 8,
+}
+
+
+def _fake_get(url, timeout=10):
+    """YouTube Data API の形をしたレスポンスを返す疑似サーバ"""
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    if parts.path.endswith("playlistItems"):
+        items = [
+            {"snippet": {"title": f"title {v}", "resourceId": {"videoId": v}}}
+            for v in VIDEO_IDS
+        ]
+    else:
+        items = [
+            {
+                "id": v,
+                "snippet": {
+                    "channelId": "UCtest",
+                    "channelTitle": "test channel",
+                    "title": f"title {v}",
+                    "publishedAt": f"2024-0{i % 3 + 1}-01T00:00:00Z",
+                },
+                "contentDetails": {"duration": "PT10M"},
+                "statistics": {"viewCount": str(100 * (i + 1))},
+            }
+            for i, v in enumerate(query["id"][0].split(","))
+        ]
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = json.dumps({"items": items}).encode("utf-8")
+    resp.encoding = "utf-8"
+    return resp
+
+
+OUTPUT_FILES = [
+    "video_analysis_result.csv",
+    "channel_summary.csv",
+    "channel_monthly_summary.csv",
+    "run_metrics.csv",
+]
+
+
+def _run_main(main, monkeypatch, output_dir) -> dict[str, pd.DataFrame]:
+    """replay モードで main.main() を実行し、出力 CSV を読み込んで返す"""
+    replay.reset(seed=0)
+    rate_limiter.reset_limiters()
+    output_dir.mkdir()
+    monkeypatch.setattr(main, "OUTPUT_DIR", output_dir)
+
+    main.main()
+
+    return {
+        name: pd.read_csv(
+            output_dir / name, encoding="utf-8-sig", keep_default_na=False
+        )
+        for name in OUTPUT_FILES
+    }
+
+
+@pytest.fixture
+def recorded_archive(tmp_path, monkeypatch):
+    """疑似サーバに対して record モードで実行し、アーカイブを作成"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(replay, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(fetch_transcripts, "TMP_SUB_DIR", tmp_path / "tmp_subs")
+    monkeypatch.setattr(replay, "IO_MODE", "record")
+    monkeypatch.setattr(replay.requests, "get", _fake_get)
+    rate_limiter.reset_limiters()
+
+    playlists = youtube_client.get_playlist_ids(VIDEO_IDS[:1], "dummy")
+    youtube_client.get_all_video_ids(playlists["playlist_id"].tolist(), "dummy")
+    youtube_client.get_video_details(VIDEO_IDS, "dummy")
+    for video_id in VIDEO_IDS:
+        sub_path = None
+        if video_id in SUBTITLES:
+            sub_path = tmp_path / f"{video_id}.ja.vtt"
+            sub_path.write_text(f"WEBVTT\n\n{SUBTITLES[video_id]}", encoding="utf-8")
+        replay.record_subtitle_file(video_id, sub_path)
+
+    # 以降はネットワークに接続しない
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    monkeypatch.setattr(replay.requests, "get", None)
+    yield tmp_path
+    rate_limiter.reset_limiters()
+
+
+def test_replay_main_is_deterministic(recorded_archive, monkeypatch):
+    monkeypatch.setattr(replay, "REPLAY_LATENCY", 0.5)
+    monkeypatch.setattr(replay, "REPLAY_ERROR_RATE", 0.3)
+    monkeypatch.setattr(replay, "REPLAY_SIMULATED_CLOCK", True)
+
+    import main  # OUTPUT_DIR の既定値は tmp_path 配下に作られる
+
+    monkeypatch.setattr(main, "VIDEO_IDS", VIDEO_IDS[:1])
+    monkeypatch.setattr(main, "TITLE_FILTER", "")
+    monkeypatch.setattr(main, "DUPLICATE_THRESHOLD", 0.8)
+    monkeypatch.setattr(main, "KEYWORD_CACHE_PATH", recorded_archive / "cache.pkl")
+
+    started = time.monotonic()
+    outputs = _run_main(main, monkeypatch, recorded_archive / "run1")
+    outputs_again = _run_main(main, monkeypatch, recorded_archive / "run2")
+    elapsed = time.monotonic() - started
+
+    for name in OUTPUT_FILES:
+        pd.testing.assert_frame_equal(outputs[name], outputs_again[name])
+
+    metrics = outputs["run_metrics.csv"]
+    assert metrics["throttles"].sum() > 0  # 疑似 429 でリミッタが減速している
+    # 待機は疑似時計で進み、実時間では待たない
+    assert elapsed < metrics["total_wait_sec"].sum()
+
+    videos = outputs["video_analysis_result.csv"].set_index("video_id")
+    assert sorted(videos.index) == VIDEO_IDS
+    # v1 は v0 と完全に同一の字幕: 重複として記録され、本文は代表動画の行のみ
+    assert videos.loc["v1", "duplicate_of"] == "v0"
+    assert videos.loc["v1", "subtitles"] == ""
+    assert videos.loc["v0", "subtitles"] == SUBTITLES["v0"]
+    assert (
+        videos.loc["v1", "medical_word_count"]
+        == videos.loc["v0", "medical_word_count"]
+    )
+    assert videos.loc["v4", "medical_word_count"] == count_keywords_in_category(
+        SUBTITLES["v4"], "medical"
+    )
+
+    channel = outputs["channel_summary.csv"]
+    assert channel["video_count"].tolist() == [len(VIDEO_IDS)]
+    assert len(outputs["channel_monthly_summary.csv"]) == 3
+
+
+def test_get_video_details_raises_after_repeated_throttling(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    monkeypatch.setattr(replay, "REPLAY_ERROR_RATE", 1.0)
+    monkeypatch.setattr(replay, "REPLAY_SIMULATED_CLOCK", True)
+    rate_limiter.reset_limiters()
+
+    with pytest.raises(RuntimeError, match="HTTP error"):
+        youtube_client.get_video_details(VIDEO_IDS, "dummy")
+
+    assert rate_limiter.get_limiter("videos").throttles == youtube_client.MAX_RETRIES
+    rate_limiter.reset_limiters()
+
+
+def test_throttled_subtitles_are_missing_not_empty(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(replay, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(fetch_transcripts, "TMP_SUB_DIR", tmp_path / "tmp_subs")
+    monkeypatch.setattr(replay, "IO_MODE", "replay")
+    monkeypatch.setattr(replay, "REPLAY_ERROR_RATE", 1.0)
+    monkeypatch.setattr(replay, "REPLAY_SIMULATED_CLOCK", True)
+    rate_limiter.reset_limiters()
+
+    result = fetch_transcripts.extract_subtitles_from_videos(["v0"])
+
+    assert result["video_id"].tolist() == ["v0"]
+    assert result["subtitles"].isna().all()  # 「字幕なし」("") とは区別する
+    assert "giving up" in capsys.readouterr().out
+    rate_limiter.reset_limiters()
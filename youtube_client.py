@@ -3,8 +3,9 @@ from dotenv import load_dotenv
 import requests
 import pandas as pd
 import isodate
-import time
-import random
+
+import replay
+from rate_limiter import get_limiter
 
 VIDEO_IDS = ["SyibOFcjCHk"]
 
@@ -19,6 +20,43 @@ if not API_KEY:
 if DEBUG:
     print(f"API Key loaded: {API_KEY[:10]}...")
 
+MAX_RETRIES = 5
+THROTTLE_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+
+def is_throttled(resp: requests.Response) -> bool:
+    """レスポンスがスロットリング（429/503, 403 rateLimitExceeded）かを判定"""
+    if resp.status_code in (429, 503):
+        return True
+    if resp.status_code == 403:
+        return any(reason in resp.text for reason in THROTTLE_REASONS)
+    return False
+
+
+def request_with_limiter(url: str, endpoint: str, timeout: int = 10):
+    """
+    エンドポイント種別ごとのリミッタで流量を調整しながら GET を送る
+
+    スロットリング時はリミッタを減速させて最大 MAX_RETRIES 回まで再試行し、
+    最後のレスポンスをそのまま返す（エラー判定は呼び出し側で行う）。
+    """
+    limiter = get_limiter(endpoint)
+    for _ in range(MAX_RETRIES):
+        limiter.wait()
+        resp = replay.http_get(url, timeout=timeout, skip_record=is_throttled)
+        if not is_throttled(resp):
+            limiter.on_success()
+            return resp
+
+        retry_after = resp.headers.get("Retry-After", "")
+        limiter.on_throttle(float(retry_after) if retry_after.isdigit() else None)
+        if DEBUG:
+            print(
+                f"Throttled ({resp.status_code}) on {endpoint}. "
+                f"rate -> {limiter.rate:.3f} req/s"
+            )
+    return resp
+
 
 def get_playlist_ids(video_ids: list[str], api_key: str):
     """Get the channel ID (UC~~)
@@ -35,7 +73,7 @@ def get_playlist_ids(video_ids: list[str], api_key: str):
         ids = ",".join(video_ids[i : i + 50])
         url = f"{base_url}?part=snippet&id={ids}&key={api_key}"
 
-        resp = requests.get(url, timeout=10)
+        resp = request_with_limiter(url, "videos")
 
         try:
             resp.raise_for_status()
@@ -57,8 +95,6 @@ def get_playlist_ids(video_ids: list[str], api_key: str):
                 )  # converting "UU~~" to "UC~~" : channel_ID to playlist_ID of all videos in the channel
             playlist_ids.append({"playlist_id": playlist_id})
 
-        time.sleep(random.uniform(0.1, 0.2))
-
     df = pd.DataFrame(playlist_ids).drop_duplicates()
 
     if DEBUG:
@@ -87,7 +123,7 @@ def get_all_video_ids(
             )
 
             try:
-                resp = requests.get(url, timeout=10)
+                resp = request_with_limiter(url, "playlist_items")
                 resp.raise_for_status()
                 data = resp.json()
 
@@ -120,8 +156,6 @@ def get_all_video_ids(
             if not next_page_token:
                 break
 
-            time.sleep(random.uniform(0.3, 0.5))
-
     if DEBUG:
         print(f"Processing finished: {len(videos)} items")
 
@@ -139,9 +173,17 @@ def get_video_details(video_ids: list[str], api_key) -> pd.DataFrame:
         url = (
             f"{base_url}?part=snippet,contentDetails,statistics&id={ids}&key={api_key}"
         )
-        resp = requests.get(url).json()
+        resp = request_with_limiter(url, "videos")
+
+        try:
+            resp.raise_for_status()
+        except requests.exceptions.HTTPError as e:  # HTTPエラー処理
+            raise RuntimeError(
+                f"HTTP error while getting video details. Please check your API key. : {e}"
+            )
+        data = resp.json()
 
-        for item in resp["items"]:
+        for item in data["items"]:
             vid = item["id"]
             title = item["snippet"]["title"]
             published_at = item["snippet"]["publishedAt"][:10]